@@ -1,33 +1,293 @@
+import asyncio
+import logging
 import os
+from datetime import datetime, timezone
+from functools import lru_cache
 from typing import List, Optional
 from fastapi import FastAPI, HTTPException
 from fastapi.middleware.cors import CORSMiddleware
-from pydantic import BaseModel
+from fastapi.responses import ORJSONResponse
+from pydantic import BaseModel, ConfigDict
 from bson import ObjectId
+from cachetools import TTLCache
+from pymongo import ReturnDocument, UpdateOne
+from pymongo.errors import DuplicateKeyError, OperationFailure
+from fastapi_cache import FastAPICache
+from fastapi_cache.backends.inmemory import InMemoryBackend
+from fastapi_cache.backends.redis import RedisBackend
+from fastapi_cache.coder import JsonCoder
+from redis import asyncio as aioredis
 
 from database import db, create_document, get_documents
 
-app = FastAPI(title="SkillSwap API")
+logger = logging.getLogger(__name__)
+
+app = FastAPI(title="SkillSwap API", default_response_class=ORJSONResponse)
+
+# Comma-separated frontend origins, e.g. "https://app.example.com,http://localhost:3000".
+# When unset any origin may call the API, but without credentials (cookies),
+# so the wildcard never turns into echoing back the caller's Origin.
+cors_origins = [o.strip() for o in os.getenv("CORS_ORIGINS", "").split(",") if o.strip()]
 
 app.add_middleware(
     CORSMiddleware,
-    allow_origins=["*"],
-    allow_credentials=True,
-    allow_methods=["*"],
-    allow_headers=["*"],
+    allow_origins=cors_origins or ["*"],
+    allow_credentials=bool(cors_origins),
+    allow_methods=["GET", "POST"],
+    # the frontend only sends JSON bodies
+    allow_headers=["Content-Type"],
 )
 
+# ---------- Caching ----------
+
+CACHE_PREFIX = "skillswap"
+RECOMMENDATIONS_TTL = 300  # seconds
+
+def recommendations_generation_key() -> str:
+    return f"{FastAPICache.get_prefix()}:rec:gen"
+
+async def recommendations_cache_key(user_id: str, limit: int) -> Optional[str]:
+    """Key for one user's cached recommendations, or None when the cache is unusable.
+
+    The key embeds a global generation number, so invalidation is a single INCR
+    and stale entries simply age out through their TTL.
+    """
+    if not FastAPICache.get_enable():
+        return None
+    try:
+        gen = await FastAPICache.get_backend().redis.get(recommendations_generation_key())
+    except Exception:
+        logger.warning("Cache generation read failed", exc_info=True)
+        return None
+    # Always scope by user so one user's recommendations are never served to another
+    return f"{FastAPICache.get_prefix()}:rec:{int(gen or 0)}:{user_id}:{limit}"
+
+async def cache_get(key: str):
+    """Read a cached value, treating a disabled or unreachable cache as a miss."""
+    if not FastAPICache.get_enable():
+        return None
+    try:
+        cached = await FastAPICache.get_backend().get(key)
+    except Exception:
+        logger.warning("Cache read failed for %s", key, exc_info=True)
+        return None
+    return None if cached is None else JsonCoder.decode(cached)
+
+async def cache_set(key: str, value, expire: int):
+    if not FastAPICache.get_enable():
+        return
+    try:
+        await FastAPICache.get_backend().set(key, JsonCoder.encode(value), expire=expire)
+    except Exception:
+        logger.warning("Cache write failed for %s", key, exc_info=True)
+
+async def invalidate_recommendations():
+    """Abandon every cached recommendation by bumping the generation number.
+
+    Never raises: callers run after their write has succeeded.
+    """
+    if not FastAPICache.get_enable():
+        return
+    try:
+        await FastAPICache.get_backend().redis.incr(recommendations_generation_key())
+    except Exception:
+        logger.warning("Cache invalidation failed", exc_info=True)
+
+# Short-lived per-process cache for wallet polling; complete_session() evicts
+# rewarded users, other workers converge within the TTL
+SKILLCOINS_TTL = 2  # seconds
+_skillcoins_cache: TTLCache = TTLCache(maxsize=10000, ttl=SKILLCOINS_TTL)
+
+# ---------- Startup ----------
+
+@app.on_event("startup")
+async def ensure_indexes():
+    """Create indexes backing the hot-path queries (idempotent)."""
+    if db is None:
+        return
+    # Not caught: without the unique pair index swipe()'s match lookup is a
+    # collection scan and duplicate matches are possible, so refuse to start.
+    await ensure_match_pair_index()
+    active = {"partialFilterExpression": {"status": "active"}}
+    indexes = [
+        ("swipe", [("user_id", 1), ("target_id", 1), ("action", 1)], {}),
+        ("match", [("user_b", 1), ("user_a", 1)], active),
+        ("userprofile", [("email", 1)], {"unique": True}),
+        ("session", [("match_id", 1)], {}),
+    ]
+    for collection, keys, options in indexes:
+        try:
+            await db[collection].create_index(keys, background=True, **options)
+        except Exception:
+            logger.exception("Index creation failed on %s %s", collection, keys)
+    # The mutual-like lookup is an equality match on all three swipe fields, so
+    # (user_id, target_id, action) serves it; a reverse index only costs writes.
+    await drop_index_if_exists("swipe", "target_id_1_user_id_1_action_1")
+
+MATCH_PAIR_INDEX = "user_pair_unique"
+LEGACY_MATCH_PAIR_INDEX = "user_a_1_user_b_1"
+
+async def ensure_match_pair_index():
+    """Build the unique (user_a, user_b) index, then retire the legacy index on the same keys."""
+    keys = [("user_a", 1), ("user_b", 1)]
+    try:
+        await db["match"].create_index(keys, name=MATCH_PAIR_INDEX, unique=True, background=True)
+    except DuplicateKeyError as e:
+        raise RuntimeError(
+            "Duplicate match pairs exist; run `python migrate_match_pairs.py` before starting"
+        ) from e
+    except OperationFailure as e:
+        # IndexOptionsConflict / IndexKeySpecsConflict: the server won't hold two
+        # indexes on the same keys, so the legacy one has to go first
+        if e.code not in (85, 86):
+            raise
+        await drop_index_if_exists("match", LEGACY_MATCH_PAIR_INDEX)
+        await db["match"].create_index(keys, name=MATCH_PAIR_INDEX, unique=True, background=True)
+    await drop_index_if_exists("match", LEGACY_MATCH_PAIR_INDEX)
+
+async def drop_index_if_exists(collection: str, name: str):
+    try:
+        await db[collection].drop_index(name)
+    except OperationFailure as e:
+        # IndexNotFound / NamespaceNotFound: already gone, e.g. dropped by another worker
+        if e.code not in (26, 27):
+            raise
+
+@app.on_event("startup")
+async def backfill_skills_lc():
+    """Populate teach_skills_lc/learn_skills_lc on profiles created before they existed."""
+    if db is None:
+        return
+    # one server-side pipeline update instead of a round trip per profile
+    await db["userprofile"].update_many(
+        {"$or": [{"teach_skills_lc": {"$exists": False}}, {"learn_skills_lc": {"$exists": False}}]},
+        [{"$set": {
+            "teach_skills_lc": lowercase_skills_expr("$teach_skills"),
+            "learn_skills_lc": lowercase_skills_expr("$learn_skills"),
+        }}],
+    )
+
+@app.on_event("startup")
+async def init_cache():
+    """Use Redis for response caching when REDIS_URL is set, otherwise disable it."""
+    redis_url = os.getenv("REDIS_URL")
+    if redis_url:
+        redis = aioredis.from_url(redis_url)
+        FastAPICache.init(RedisBackend(redis), prefix=CACHE_PREFIX)
+        if db is not None:
+            app.state.profile_watcher = asyncio.create_task(watch_profile_changes())
+    else:
+        FastAPICache.init(InMemoryBackend(), prefix=CACHE_PREFIX, enable=False)
+
+@app.on_event("shutdown")
+async def stop_profile_watcher():
+    watcher = getattr(app.state, "profile_watcher", None)
+    if watcher is not None:
+        watcher.cancel()
+
+# Server error codes that end or reset the profile watcher
+CHANGE_STREAMS_UNSUPPORTED = 40573  # standalone server, no replica set
+RESUME_TOKEN_LOST = (280, 286)  # ChangeStreamFatalError, ChangeStreamHistoryLost
+
+async def watch_profile_changes():
+    """Invalidate cached recommendations whenever a profile that feeds them changes.
+
+    Uses a change stream, so it needs a replica set; on a standalone server the
+    watcher logs and exits and the cache falls back to TTL expiry. Other errors
+    reopen the stream from the last resume token with exponential backoff.
+    Every worker runs one, which is cheap because invalidation is a single INCR.
+    """
+    pipeline = [{"$match": {"operationType": {"$in": ["insert", "update", "replace", "delete"]}}}]
+    resume_token = None
+    delay = 1
+    while True:
+        try:
+            async with db["userprofile"].watch(pipeline, resume_after=resume_token) as stream:
+                delay = 1
+                async for change in stream:
+                    resume_token = stream.resume_token
+                    try:
+                        if profile_change_affects_recommendations(change):
+                            # the profile is scored in everyone's recommendations, not just its own
+                            await invalidate_recommendations()
+                    except Exception:
+                        logger.exception("Failed to handle profile change %s", change.get("_id"))
+        except asyncio.CancelledError:
+            raise
+        except OperationFailure as e:
+            if e.code == CHANGE_STREAMS_UNSUPPORTED:
+                logger.warning("Change streams unavailable; recommendations fall back to TTL expiry")
+                return
+            if e.code in RESUME_TOKEN_LOST:
+                # events were missed, so start fresh and assume something changed
+                resume_token = None
+                await invalidate_recommendations()
+            logger.exception("Profile change stream failed; reopening in %ss", delay)
+        except Exception:
+            logger.exception("Profile change stream failed; reopening in %ss", delay)
+        await asyncio.sleep(delay)
+        delay = min(delay * 2, 60)
+
+def profile_change_affects_recommendations(change: dict) -> bool:
+    if change["operationType"] != "update":
+        return True
+    desc = change["updateDescription"]
+    fields = list(desc.get("updatedFields", {})) + list(desc.get("removedFields", []))
+    # e.g. skillcoins updates don't affect anyone's recommendations
+    return any(f.split(".")[0] in RECOMMENDATION_FIELDS for f in fields)
+
 # ---------- Utility ----------
 
+@lru_cache(maxsize=4096)
 def oid(id_str: str) -> ObjectId:
+    # ObjectIds are immutable, so repeat ids (polling clients) reuse the parsed value
     try:
         return ObjectId(id_str)
     except Exception:
         raise HTTPException(status_code=400, detail="Invalid id")
 
+# Lowercased copies of the skill lists, maintained at write time for scoring
+SKILLS_LC_PROJECTION = {"teach_skills_lc": 1, "learn_skills_lc": 1}
+HIDE_SKILLS_LC = {"teach_skills_lc": 0, "learn_skills_lc": 0}
+
+def match_pair(user_id: str, other_id: str) -> tuple:
+    """Canonical (user_a, user_b) ordering so each pair maps to a single match document."""
+    a, b = sorted((user_id, other_id))
+    return a, b
+
+def lowercase_skills_expr(field: str) -> dict:
+    """Aggregation expression lowercasing a skill list, for docs without stored _lc fields."""
+    return {"$map": {"input": {"$ifNull": [field, []]}, "in": {"$toLower": "$$this"}}}
+
+def skills_lc_fields(teach_skills: List[str], learn_skills: List[str]) -> dict:
+    return {
+        "teach_skills_lc": [sk.lower() for sk in teach_skills],
+        "learn_skills_lc": [sk.lower() for sk in learn_skills],
+    }
+
+# Profile fields needed to render a user card (recommendations, matches)
+PROFILE_CARD_PROJECTION = {"name": 1, "avatar_url": 1, "teach_skills": 1, "learn_skills": 1}
+
+# Health checks poll /test often; collections are created lazily (e.g.
+# rewardtransaction on the first completed session), so refresh periodically
+COLLECTIONS_TTL = 60  # seconds
+_collection_names: TTLCache = TTLCache(maxsize=1, ttl=COLLECTIONS_TTL)
+
+async def collection_names() -> List[str]:
+    """Collection names for the health check, at most COLLECTIONS_TTL seconds old."""
+    names = _collection_names.get("names")
+    if names is None:
+        names = _collection_names["names"] = await db.list_collection_names()
+    return names
+
+# Fields whose changes invalidate cached recommendations
+RECOMMENDATION_FIELDS = set(PROFILE_CARD_PROJECTION) | set(SKILLS_LC_PROJECTION)
+
 # ---------- Request Models ----------
 
 class UserCreate(BaseModel):
+    model_config = ConfigDict(frozen=True)
+
     name: str
     email: str
     bio: Optional[str] = None
@@ -38,11 +298,15 @@ class UserCreate(BaseModel):
     availability: Optional[str] = None
 
 class SwipeAction(BaseModel):
+    model_config = ConfigDict(frozen=True)
+
     user_id: str
     target_id: str
     action: str  # 'like' or 'pass'
 
 class SessionCreate(BaseModel):
+    model_config = ConfigDict(frozen=True)
+
     match_id: str
     topic: Optional[str] = None
     scheduled_time: Optional[str] = None
@@ -51,11 +315,11 @@ class SessionCreate(BaseModel):
 # ---------- Core Endpoints ----------
 
 @app.get("/")
-def read_root():
+async def read_root():
     return {"message": "SkillSwap Backend Running"}
 
 @app.get("/test")
-def test_database():
+async def test_database():
     response = {
         "backend": "✅ Running",
         "database": "❌ Not Available",
@@ -70,109 +334,173 @@ def test_database():
             response["database_url"] = "✅ Set" if os.getenv("DATABASE_URL") else "❌ Not Set"
             response["database_name"] = db.name
             response["connection_status"] = "Connected"
-            response["collections"] = db.list_collection_names()
+            response["collections"] = await collection_names()
     except Exception as e:
         response["database"] = f"❌ Error: {str(e)[:80]}"
     return response
 
 # Users
 @app.post("/api/users")
-def create_or_get_user(payload: UserCreate):
-    existing = db["userprofile"].find_one({"email": payload.email})
-    if existing:
-        existing["id"] = str(existing.pop("_id"))
-        return existing
-    doc_id = create_document("userprofile", payload.model_dump())
-    user = db["userprofile"].find_one({"_id": ObjectId(doc_id)})
+async def create_or_get_user(payload: UserCreate):
+    # Single atomic get-or-create, backed by the unique email index. The _id is
+    # chosen here so we can tell whether this call inserted the profile.
+    new_id = ObjectId()
+    now = datetime.now(timezone.utc)
+    # Unset optional fields (bio, avatar_url, ...) are not stored, so new
+    # profiles omit them in responses where older ones return null
+    doc = payload.model_dump(exclude={"email"}, exclude_none=True)
+    doc.update(skills_lc_fields(payload.teach_skills, payload.learn_skills))
+    doc.update({"_id": new_id, "created_at": now, "updated_at": now})
+    try:
+        user = await db["userprofile"].find_one_and_update(
+            {"email": payload.email},
+            {"$setOnInsert": doc},
+            upsert=True,
+            return_document=ReturnDocument.AFTER,
+            projection=HIDE_SKILLS_LC,
+        )
+    except DuplicateKeyError:
+        # lost an insert race with a concurrent signup for the same email
+        user = await db["userprofile"].find_one({"email": payload.email}, projection=HIDE_SKILLS_LC)
+    if user["_id"] == new_id:
+        # a new user changes everyone's candidate pool
+        await invalidate_recommendations()
     user["id"] = str(user.pop("_id"))
     return user
 
 @app.get("/api/users")
-def list_users():
-    users = list(db["userprofile"].find())
+async def list_users():
+    users = await db["userprofile"].find(projection=HIDE_SKILLS_LC).to_list(length=None)
     for u in users:
         u["id"] = str(u.pop("_id"))
     return users
 
 # Recommendations (AI Matching heuristic)
 @app.get("/api/recommendations")
-def recommendations(user_id: str, limit: int = 20):
-    me = db["userprofile"].find_one({"_id": oid(user_id)})
+async def recommendations(user_id: str, limit: int = 20):
+    # Cached server-side only: no Cache-Control/ETag is sent, so invalidation
+    # is visible to clients on their next request
+    key = await recommendations_cache_key(user_id, limit)
+    if key is None:
+        return await score_recommendations(user_id, limit)
+    cached = await cache_get(key)
+    if cached is not None:
+        return cached
+    scored = await score_recommendations(user_id, limit)
+    await cache_set(key, scored, RECOMMENDATIONS_TTL)
+    return scored
+
+async def score_recommendations(user_id: str, limit: int) -> List[dict]:
+    me_oid = oid(user_id)
+    me = await db["userprofile"].find_one(
+        {"_id": me_oid},
+        projection={"teach_skills": 1, "learn_skills": 1, **SKILLS_LC_PROJECTION},
+    )
     if not me:
         raise HTTPException(404, "User not found")
+    if limit <= 0:
+        return []
+
+    # Simple heuristic: score by mutual interest overlap, computed server-side
+    # profiles not yet backfilled (e.g. written by an older worker) lack the _lc fields
+    fallback = skills_lc_fields(me.get("teach_skills") or [], me.get("learn_skills") or [])
+    my_teach = sorted(set(me.get("teach_skills_lc") or fallback["teach_skills_lc"]))
+    my_learn = sorted(set(me.get("learn_skills_lc") or fallback["learn_skills_lc"]))
 
-    # Simple heuristic: score by mutual interest overlap
-    candidates = list(db["userprofile"].find({"_id": {"$ne": oid(user_id)}}))
-    scored = []
-    my_teach = set(map(str.lower, me.get("teach_skills", [])))
-    my_learn = set(map(str.lower, me.get("learn_skills", [])))
-
-    for c in candidates:
-        teach = set(map(str.lower, c.get("teach_skills", [])))
-        learn = set(map(str.lower, c.get("learn_skills", [])))
-        score = 0
-        # I can teach what they want to learn
-        score += len(my_teach & learn) * 3
-        # They can teach what I want to learn
-        score += len(teach & my_learn) * 3
-        # general interest overlap
-        score += len((my_teach | my_learn) & (teach | learn))
-        if score > 0:
-            c_copy = dict(c)
-            c_copy["id"] = str(c_copy.pop("_id"))
-            c_copy["score"] = score
-            scored.append(c_copy)
-
-    scored.sort(key=lambda x: x["score"], reverse=True)
-    return scored[:limit]
+    pipeline = [
+        {"$match": {"_id": {"$ne": me_oid}}},
+        {"$project": {**PROFILE_CARD_PROJECTION, **SKILLS_LC_PROJECTION}},
+        {"$addFields": {
+            "teach_skills_lc": {"$ifNull": ["$teach_skills_lc", lowercase_skills_expr("$teach_skills")]},
+            "learn_skills_lc": {"$ifNull": ["$learn_skills_lc", lowercase_skills_expr("$learn_skills")]},
+        }},
+        {"$addFields": {
+            "score": {"$add": [
+                # I can teach what they want to learn
+                {"$multiply": [3, {"$size": {"$setIntersection": [{"$literal": my_teach}, "$learn_skills_lc"]}}]},
+                # They can teach what I want to learn
+                {"$multiply": [3, {"$size": {"$setIntersection": ["$teach_skills_lc", {"$literal": my_learn}]}}]},
+                # general interest overlap
+                {"$size": {"$setIntersection": [
+                    {"$setUnion": [{"$literal": my_teach}, {"$literal": my_learn}]},
+                    {"$setUnion": ["$teach_skills_lc", "$learn_skills_lc"]},
+                ]}},
+            ]},
+        }},
+        {"$match": {"score": {"$gt": 0}}},
+        # keep $limit directly after $sort: Mongo coalesces them into a top-K
+        # sort that only holds `limit` documents in memory. _id breaks ties so
+        # equal scores come back in a stable order (cached or not).
+        {"$sort": {"score": -1, "_id": 1}},
+        {"$limit": limit},
+        {"$addFields": {"id": {"$toString": "$_id"}}},
+        {"$project": {"_id": 0, **HIDE_SKILLS_LC}},
+    ]
+    return await db["userprofile"].aggregate(pipeline).to_list(length=None)
 
 # Swipes and Matches
 @app.post("/api/swipe")
-def swipe(payload: SwipeAction):
+async def swipe(payload: SwipeAction):
     if payload.action not in ("like", "pass"):
         raise HTTPException(400, "Invalid action")
 
     # record swipe
-    create_document("swipe", payload.model_dump())
+    await create_document("swipe", payload.model_dump())
 
     if payload.action == "like":
-        # check mutual like
-        mutual = db["swipe"].find_one({
+        # check mutual like; projecting only indexed fields (no _id) makes this
+        # a covered query on the (user_id, target_id, action) index
+        mutual = await db["swipe"].find_one({
             "user_id": payload.target_id,
             "target_id": payload.user_id,
             "action": "like",
-        })
+        }, projection={"_id": 0, "action": 1})
         if mutual:
-            # ensure match not already exists
-            existing = db["match"].find_one({
-                "$or": [
-                    {"user_a": payload.user_id, "user_b": payload.target_id},
-                    {"user_a": payload.target_id, "user_b": payload.user_id},
-                ]
-            })
-            if not existing:
-                match_id = create_document("match", {
-                    "user_a": payload.user_id,
-                    "user_b": payload.target_id,
-                    "status": "active",
-                })
-                return {"status": "matched", "match_id": match_id}
-            else:
-                return {"status": "matched", "match_id": str(existing["_id"])}
+            # atomically get-or-create the match; the sorted pair is a single
+            # equality lookup on the unique (user_a, user_b) index. The upsert
+            # alone does not prevent duplicates; that index does.
+            user_a, user_b = match_pair(payload.user_id, payload.target_id)
+            now = datetime.now(timezone.utc)
+            try:
+                match = await db["match"].find_one_and_update(
+                    {"user_a": user_a, "user_b": user_b},
+                    {"$setOnInsert": {
+                        # the pair is stored sorted, so record who hosts
+                        # sessions separately: the user whose like made the match
+                        "host_id": payload.user_id,
+                        "status": "active",
+                        "created_at": now,
+                        "updated_at": now,
+                    }},
+                    upsert=True,
+                    return_document=ReturnDocument.AFTER,
+                )
+            except DuplicateKeyError:
+                # lost an insert race with the other user's like
+                match = await db["match"].find_one({"user_a": user_a, "user_b": user_b})
+            return {"status": "matched", "match_id": str(match["_id"])}
 
     return {"status": "recorded"}
 
 @app.get("/api/matches")
-def get_matches(user_id: str):
-    ms = list(db["match"].find({
+async def get_matches(user_id: str):
+    ms = await db["match"].find({
         "$or": [{"user_a": user_id}, {"user_b": user_id}],
         "status": "active",
-    }))
+    }).to_list(length=None)
+    other_ids = [m["user_b"] if m["user_a"] == user_id else m["user_a"] for m in ms]
+    others = {
+        str(u["_id"]): u
+        async for u in db["userprofile"].find(
+            {"_id": {"$in": [oid(i) for i in set(other_ids)]}},
+            projection=PROFILE_CARD_PROJECTION,
+        )
+    }
     enriched = []
-    for m in ms:
-        other_id = m["user_b"] if m["user_a"] == user_id else m["user_a"]
-        other = db["userprofile"].find_one({"_id": oid(other_id)})
+    for m, other_id in zip(ms, other_ids):
+        other = others.get(other_id)
         if other:
+            other = dict(other)
             other["id"] = str(other.pop("_id"))
         enriched.append({
             "id": str(m["_id"]),
@@ -182,14 +510,16 @@ def get_matches(user_id: str):
 
 # Sessions
 @app.post("/api/sessions")
-def create_session(payload: SessionCreate):
-    match = db["match"].find_one({"_id": oid(payload.match_id)})
+async def create_session(payload: SessionCreate):
+    match = await db["match"].find_one({"_id": oid(payload.match_id)})
     if not match:
         raise HTTPException(404, "Match not found")
-    session_id = create_document("session", {
+    host_id = match.get("host_id") or match["user_a"]
+    guest_id = match["user_b"] if host_id == match["user_a"] else match["user_a"]
+    session_id = await create_document("session", {
         "match_id": payload.match_id,
-        "host_id": match["user_a"],
-        "guest_id": match["user_b"],
+        "host_id": host_id,
+        "guest_id": guest_id,
         "topic": payload.topic,
         "scheduled_time": payload.scheduled_time,
         "mode": payload.mode,
@@ -198,31 +528,45 @@ def create_session(payload: SessionCreate):
     return {"id": session_id}
 
 @app.post("/api/sessions/{session_id}/complete")
-def complete_session(session_id: str):
-    s = db["session"].find_one({"_id": oid(session_id)})
+async def complete_session(session_id: str):
+    s = await db["session"].find_one({"_id": oid(session_id)})
     if not s:
         raise HTTPException(404, "Session not found")
-    db["session"].update_one({"_id": s["_id"]}, {"$set": {"status": "completed"}})
+    await db["session"].update_one({"_id": s["_id"]}, {"$set": {"status": "completed"}})
 
     # Reward both users with SkillCoins
     reward = 10
-    for uid in [s["host_id"], s["guest_id"]]:
-        db["rewardtransaction"].insert_one({
+    uids = [s["host_id"], s["guest_id"]]
+    await db["rewardtransaction"].insert_many([
+        {
             "user_id": uid,
             "amount": reward,
             "reason": f"Completed session {session_id}",
-        })
-        db["userprofile"].update_one({"_id": oid(uid)}, {"$inc": {"skillcoins": reward}})
+        }
+        for uid in uids
+    ], ordered=False)
+    await db["userprofile"].bulk_write([
+        UpdateOne({"_id": oid(uid)}, {"$inc": {"skillcoins": reward}})
+        for uid in uids
+    ], ordered=False)
+    for uid in uids:
+        _skillcoins_cache.pop(uid, None)
     return {"status": "completed", "skillcoins_awarded": reward}
 
 @app.get("/api/skillcoins")
-def get_skillcoins(user_id: str):
-    u = db["userprofile"].find_one({"_id": oid(user_id)})
-    if not u:
-        raise HTTPException(404, "User not found")
-    return {"balance": int(u.get("skillcoins", 0))}
+async def get_skillcoins(user_id: str):
+    balance = _skillcoins_cache.get(user_id)
+    if balance is None:
+        u = await db["userprofile"].find_one({"_id": oid(user_id)}, projection={"skillcoins": 1})
+        if not u:
+            raise HTTPException(404, "User not found")
+        balance = _skillcoins_cache[user_id] = int(u.get("skillcoins", 0))
+    return {"balance": balance}
 
 if __name__ == "__main__":
+    # Production runs under gunicorn (see Procfile); this is the local equivalent.
+    # uvicorn picks up uvloop and httptools automatically when installed.
     import uvicorn
     port = int(os.getenv("PORT", 8000))
-    uvicorn.run(app, host="0.0.0.0", port=port)
+    workers = int(os.getenv("WEB_CONCURRENCY", os.cpu_count() or 1))
+    uvicorn.run("main:app", host="0.0.0.0", port=port, workers=workers)
@@ -0,0 +1,65 @@
+"""
+One-off migration: store matches as sorted (user_a, user_b) pairs.
+
+Run once, before deploying the version that looks matches up by sorted pair:
+
+    python migrate_match_pairs.py
+
+- Records host_id = user_a on matches that lack it, so session hosts stay the
+  same after the pair is reordered (user_a used to be the user whose like
+  made the match).
+- Merges duplicate matches for the same pair into one survivor, preferring an
+  active match and then the oldest; sessions are repointed to the survivor.
+- Swaps user_a/user_b where they are not in sorted order.
+
+Safe to re-run. The API refuses to start while duplicate pairs remain.
+"""
+
+import asyncio
+import logging
+
+from database import db
+
+logger = logging.getLogger("migrate_match_pairs")
+
+async def migrate():
+    if db is None:
+        raise SystemExit("Database not available. Check DATABASE_URL and DATABASE_NAME environment variables.")
+
+    result = await db["match"].update_many(
+        {"host_id": {"$exists": False}},
+        [{"$set": {"host_id": "$user_a"}}],
+    )
+    logger.info("Recorded host_id on %d matches", result.modified_count)
+
+    dupes = await db["match"].aggregate([
+        {"$addFields": {"_inactive": {"$cond": [{"$eq": ["$status", "active"]}, 0, 1]}}},
+        {"$sort": {"_inactive": 1, "_id": 1}},
+        {"$group": {
+            "_id": {"a": {"$min": ["$user_a", "$user_b"]}, "b": {"$max": ["$user_a", "$user_b"]}},
+            "ids": {"$push": "$_id"},
+        }},
+        {"$match": {"ids.1": {"$exists": True}}},
+    ], allowDiskUse=True).to_list(length=None)
+    for d in dupes:
+        keep, drop = d["ids"][0], d["ids"][1:]
+        logger.warning(
+            "Merging duplicate matches %s for pair %s/%s into %s",
+            [str(i) for i in drop], d["_id"]["a"], d["_id"]["b"], keep,
+        )
+        # sessions reference matches by id; point them at the surviving match
+        await db["session"].update_many(
+            {"match_id": {"$in": [str(i) for i in drop]}},
+            {"$set": {"match_id": str(keep)}},
+        )
+        await db["match"].delete_many({"_id": {"$in": drop}})
+
+    result = await db["match"].update_many(
+        {"$expr": {"$gt": ["$user_a", "$user_b"]}},
+        [{"$set": {"user_a": "$user_b", "user_b": "$user_a"}}],
+    )
+    logger.info("Merged %d duplicate pairs, reordered %d matches", len(dupes), result.modified_count)
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format="%(levelname)s %(message)s")
+    asyncio.run(migrate())
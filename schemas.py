@@ -36,8 +36,9 @@ class Match(BaseModel):
     Collection: match
     Represents a mutual like between two users.
     """
-    user_a: str
+    user_a: str  # user_a < user_b: one document per pair
     user_b: str
+    host_id: Optional[str] = None  # hosts sessions; the user whose like made the match
     status: Literal["pending", "active", "blocked"] = "pending"
 
 class Session(BaseModel):